@@ -1,13 +1,82 @@
 import numpy as np
+import tifffile
+from functools import lru_cache
 from pathlib import Path
 
+from numba import njit, prange, types
+from numba.typed import Dict
+from scipy.ndimage import label, maximum_filter1d
 from shapely.geometry import Polygon
-from skimage.io import imread
 from skimage.feature import canny
 from skimage.filters import threshold_otsu
-from skimage.morphology import disk, closing, binary_dilation
-from skimage.measure import label, regionprops,  find_contours,\
-                            approximate_polygon
+from skimage.morphology import disk
+
+try:
+    import arrayfire as af
+except (ImportError, OSError, RuntimeError):
+    #  arrayfire raises OSError or RuntimeError when its runtime
+    #  libraries can not be loaded
+    af = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _to_serializable(
+    obj
+):
+    """
+    Function for converting numpy arrays to json serializable lists.
+
+    Returns
+    -------
+    output : list
+        Nested list with the array items.
+
+    Parameters
+    ----------
+    obj : np.ndarray
+        Object not serializable by the json module.
+    """
+
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"object of type {type(obj).__name__} "
+                    "is not JSON serializable")
+
+
+def imread(
+    filepath: Path,
+    mode: str = 'r'
+) -> np.ndarray:
+    """
+    Function for reading tiff images.
+
+    Returns
+    -------
+    output : np.ndarray
+        Image array.
+
+    Parameters
+    ----------
+    filepath : Path
+        Path to the tiff image.
+    mode : str, optional
+        Memory map mode: 'r' for read-only, 'c' for copy-on-write,
+        'r' by default.
+
+    Notes
+    -----
+    Uncompressed images are memory mapped instead of being decoded into
+    a new array, other images are read with tifffile.imread.
+    """
+
+    try:
+        return np.asarray(tifffile.memmap(filepath, mode=mode))
+    except ValueError:
+        return tifffile.imread(filepath)
 
 
 def write_json(
@@ -27,11 +96,517 @@ def write_json(
         Input json dictionary.
     filepath : Path
         Path to save json dictionary.
+
+    Notes
+    -----
+    orjson is used for serialization if it is installed.
     """
 
+    if orjson is not None:
+        with open(filepath, 'wb') as door:
+            door.write(orjson.dumps(
+                json_obj, default=_to_serializable,
+                option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+        return
+
     import json
     with open(filepath, 'w') as door:
-        json.dump(json_obj, door, indent=2, ensure_ascii=False)
+        json.dump(json_obj, door, indent=2, ensure_ascii=False,
+                  default=_to_serializable)
+
+
+@njit(cache=True)
+def _signed_area(
+    xy: np.ndarray
+) -> float:
+    """
+    Function for computing the signed area of a contour (shoelace formula).
+
+    Returns
+    -------
+    output : float
+        Signed contour area, positive for counter-clockwise orientation.
+
+    Parameters
+    ----------
+    xy : np.ndarray
+        Nx2 float64 array of the contour coordinates.
+    """
+
+    n = xy.shape[0]
+    s = 0.0
+    for i in range(n):
+        j = (i + 1) % n
+        s += xy[i, 0] * xy[j, 1] - xy[j, 0] * xy[i, 1]
+    return 0.5 * s
+
+
+@njit(cache=True)
+def _orientation(
+    ax: float, ay: float,
+    bx: float, by: float,
+    cx: float, cy: float
+) -> int:
+    """
+    Function for computing the orientation of the point triplet (a, b, c).
+
+    Returns
+    -------
+    output : int
+        1 for counter-clockwise, -1 for clockwise, 0 for collinear points.
+    """
+
+    d = (bx - ax) * (cy - ay) - (by - ay) * (cx - ax)
+    if d > 0:
+        return 1
+    if d < 0:
+        return -1
+    return 0
+
+
+@njit(cache=True)
+def _on_segment(
+    ax: float, ay: float,
+    bx: float, by: float,
+    cx: float, cy: float
+) -> bool:
+    """
+    Function for checking if the collinear point c lies on the segment (a, b).
+
+    Returns
+    -------
+    output : bool
+        True if c lies within the bounding box of the segment.
+    """
+
+    return (min(ax, bx) <= cx <= max(ax, bx)
+            and min(ay, by) <= cy <= max(ay, by))
+
+
+@njit(cache=True)
+def _has_self_intersection(
+    xy: np.ndarray
+) -> bool:
+    """
+    Function for detecting self-intersections of a contour.
+
+    Returns
+    -------
+    output : bool
+        True if the contour may be not simple, False otherwise.
+
+    Parameters
+    ----------
+    xy : np.ndarray
+        Nx2 float64 array of the contour coordinates.
+        The contour may be either closed (first point equals the last one)
+        or open.
+
+    Notes
+    -----
+    The test is conservative: touching segments, spikes, repeated points
+    and degenerate contours are reported as intersections.
+
+    Segments are swept in the order of their smallest x, so only the
+    segments overlapping along x are tested. Contours with too many such
+    pairs are reported as intersecting as well.
+    """
+
+    n = xy.shape[0]
+    if n > 1 and xy[0, 0] == xy[n - 1, 0] and xy[0, 1] == xy[n - 1, 1]:
+        n -= 1
+    if n < 3:
+        return True
+
+    x_min = np.empty(n, dtype=np.float64)
+    x_max = np.empty(n, dtype=np.float64)
+    for i in range(n):
+        i2 = (i + 1) % n
+        ax, ay = xy[i, 0], xy[i, 1]
+        bx, by = xy[i2, 0], xy[i2, 1]
+        if ax == bx and ay == by:
+            return True
+
+        #  Spike: the next segment goes back along the current one
+        cx, cy = xy[(i + 2) % n, 0], xy[(i + 2) % n, 1]
+        if (_orientation(ax, ay, bx, by, cx, cy) == 0
+                and (bx - ax) * (cx - bx) + (by - ay) * (cy - by) <= 0):
+            return True
+        x_min[i], x_max[i] = min(ax, bx), max(ax, bx)
+
+    #  Sweep the segments from left to right, only the segments
+    #  overlapping along x are tested against each other
+    order = np.argsort(x_min)
+    n_tests = 0
+    for k in range(n):
+        i = order[k]
+        i2 = (i + 1) % n
+        ax, ay = xy[i, 0], xy[i, 1]
+        bx, by = xy[i2, 0], xy[i2, 1]
+        for m in range(k + 1, n):
+            j = order[m]
+            if x_min[j] > x_max[i]:
+                break
+            n_tests += 1
+            if n_tests > 64 * n:
+                return True
+            if abs(i - j) == 1 or abs(i - j) == n - 1:
+                continue
+            j2 = (j + 1) % n
+            cx, cy = xy[j, 0], xy[j, 1]
+            dx, dy = xy[j2, 0], xy[j2, 1]
+            if max(ay, by) < min(cy, dy) or max(cy, dy) < min(ay, by):
+                continue
+            o1 = _orientation(ax, ay, bx, by, cx, cy)
+            o2 = _orientation(ax, ay, bx, by, dx, dy)
+            o3 = _orientation(cx, cy, dx, dy, ax, ay)
+            o4 = _orientation(cx, cy, dx, dy, bx, by)
+            if o1 != o2 and o3 != o4:
+                return True
+            if o1 == 0 and _on_segment(ax, ay, bx, by, cx, cy):
+                return True
+            if o2 == 0 and _on_segment(ax, ay, bx, by, dx, dy):
+                return True
+            if o3 == 0 and _on_segment(cx, cy, dx, dy, ax, ay):
+                return True
+            if o4 == 0 and _on_segment(cx, cy, dx, dy, bx, by):
+                return True
+    return False
+
+
+@njit(cache=True, parallel=True)
+def _field_mask(
+    index_img: np.ndarray,
+    low_veg_mask: np.ndarray,
+    thresh: float,
+    out: np.ndarray
+):
+    """
+    Function for generating the mask of potential field regions.
+
+    Returns
+    -------
+    output : None
+        The result is written to out.
+
+    Parameters
+    ----------
+    index_img : np.ndarray
+        2D array of msavi2 image.
+    low_veg_mask : np.ndarray
+        2D boolean mask of low vegetation regions.
+    thresh : float
+        Pixels below the threshold outside low vegetation regions
+        are marked as fields.
+    out : np.ndarray
+        2D boolean output array of the same shape as index_img.
+    """
+
+    for i in prange(index_img.shape[0]):
+        for j in range(index_img.shape[1]):
+            out[i, j] = index_img[i, j] < thresh and not low_veg_mask[i, j]
+
+
+@lru_cache(maxsize=16)
+def _disk(
+    radius: int
+) -> np.ndarray:
+    """
+    Function for building a disk-shaped footprint once per radius.
+
+    Returns
+    -------
+    output : np.ndarray
+        Read-only footprint from skimage.morphology.disk,
+        shared between calls.
+
+    Parameters
+    ----------
+    radius : int
+        The radius of the disk.
+    """
+
+    footprint = disk(radius)
+    footprint.flags.writeable = False
+    return footprint
+
+
+def _binary_dilation(
+    mask: np.ndarray,
+    footprint: np.ndarray,
+    mode: str = 'constant'
+) -> np.ndarray:
+    """
+    Function for binary dilation with a row-convex symmetric footprint.
+
+    Returns
+    -------
+    output : np.ndarray
+        Dilated boolean mask.
+
+    Parameters
+    ----------
+    mask : np.ndarray
+        2D boolean input mask.
+    footprint : np.ndarray
+        Odd-sized symmetric footprint, each row of which is a single
+        centered run of ones (e.g. disk).
+    mode : str, optional
+        Border handling: 'constant' treats pixels outside the mask as False,
+        'reflect' mirrors the mask, 'constant' by default.
+
+    Notes
+    -----
+    The footprint is decomposed into horizontal chords. Each distinct chord
+    is applied once with the O(N) running maximum filter, then the result
+    is shifted vertically for every row of that length and combined, so the
+    cost does not depend on the chord length and only one filtered image is
+    kept at a time.
+    """
+
+    r_y, r_x = footprint.shape[0] // 2, footprint.shape[1] // 2
+    padded = np.pad(mask, ((r_y, r_y), (r_x, r_x)),
+                    mode='symmetric' if mode == 'reflect' else 'constant')
+    h, w = mask.shape
+    out = np.zeros(mask.shape, dtype=bool)
+    lengths = np.count_nonzero(footprint, axis=1)
+    for n in np.unique(lengths[lengths > 0]):
+        chord = maximum_filter1d(padded, n, axis=1)
+        for dy in np.flatnonzero(lengths == n):
+            out |= chord[dy:dy + h, r_x:r_x + w]
+        del chord
+    return out
+
+
+def _binary_closing(
+    mask: np.ndarray,
+    footprint: np.ndarray
+) -> np.ndarray:
+    """
+    Function for binary closing with a row-convex symmetric footprint.
+
+    Returns
+    -------
+    output : np.ndarray
+        Closed boolean mask.
+
+    Parameters
+    ----------
+    mask : np.ndarray
+        2D boolean input mask.
+    footprint : np.ndarray
+        Odd-sized symmetric footprint, each row of which is a single
+        centered run of ones (e.g. disk).
+
+    Notes
+    -----
+    Equivalent to skimage.morphology.closing with the default 'reflect'
+    border mode. Erosion is computed as dilation of the inverted mask.
+    """
+
+    dilated = _binary_dilation(mask, footprint, mode='reflect')
+    np.logical_not(dilated, out=dilated)
+    closed = _binary_dilation(dilated, footprint, mode='reflect')
+    return np.logical_not(closed, out=closed)
+
+
+@njit(cache=True)
+def _otsu_from_hist(
+    counts: np.ndarray,
+    bin_centers: np.ndarray
+) -> float:
+    """
+    Function for computing the Otsu threshold from a histogram.
+
+    Returns
+    -------
+    output : float
+        The bin center maximizing the between-class variance.
+
+    Parameters
+    ----------
+    counts : np.ndarray
+        Histogram counts.
+    bin_centers : np.ndarray
+        Centers of the histogram bins.
+    """
+
+    weight1 = np.cumsum(counts)
+    weight2 = np.cumsum(counts[::-1])[::-1]
+    mean1 = np.cumsum(counts * bin_centers) / weight1
+    mean2 = (np.cumsum((counts * bin_centers)[::-1]) / weight2[::-1])[::-1]
+    variance12 = weight1[:-1] * weight2[1:] * (mean1[:-1] - mean2[1:]) ** 2
+    return bin_centers[np.argmax(variance12)]
+
+
+@njit(cache=True, parallel=True)
+def _masked_min_max(
+    img: np.ndarray,
+    mask: np.ndarray
+):
+    """
+    Function for computing the range of the image pixels outside the mask.
+
+    Returns
+    -------
+    lo : float
+        Minimum pixel value, +inf if all pixels are masked.
+    hi : float
+        Maximum pixel value, -inf if all pixels are masked.
+
+    Parameters
+    ----------
+    img : np.ndarray
+        2D input image.
+    mask : np.ndarray
+        2D boolean mask of the ignored pixels.
+    """
+
+    h = img.shape[0]
+    row_lo = np.full(h, np.inf)
+    row_hi = np.full(h, -np.inf)
+    for i in prange(h):
+        for j in range(img.shape[1]):
+            if not mask[i, j]:
+                row_lo[i] = min(row_lo[i], img[i, j])
+                row_hi[i] = max(row_hi[i], img[i, j])
+    return row_lo.min(), row_hi.max()
+
+
+@njit(cache=True, parallel=True)
+def _masked_histogram(
+    img: np.ndarray,
+    mask: np.ndarray,
+    bin_edges: np.ndarray
+) -> np.ndarray:
+    """
+    Function for computing the histogram of the image pixels outside the mask.
+
+    Returns
+    -------
+    output : np.ndarray
+        Histogram counts.
+
+    Parameters
+    ----------
+    img : np.ndarray
+        2D input image.
+    mask : np.ndarray
+        2D boolean mask of the ignored pixels.
+    bin_edges : np.ndarray
+        Uniform bin edges of the img dtype covering the pixels range.
+
+    Notes
+    -----
+    Pixels are assigned to the bins with the same arithmetic as
+    np.histogram uses for uniform bins.
+    """
+
+    nbins = bin_edges.shape[0] - 1
+    first = bin_edges[0]
+    denom = bin_edges[nbins] - first
+    norm = bin_edges.dtype.type(nbins)
+    h = img.shape[0]
+    n_chunks = min(h, 64)
+    chunk = (h + n_chunks - 1) // n_chunks
+    counts = np.zeros((n_chunks, nbins), dtype=np.int64)
+    for k in prange(n_chunks):
+        for i in range(k * chunk, min(h, (k + 1) * chunk)):
+            for j in range(img.shape[1]):
+                if mask[i, j]:
+                    continue
+                v = img[i, j]
+                idx = min(int((v - first) / denom * norm), nbins - 1)
+                if v < bin_edges[idx]:
+                    idx -= 1
+                elif v >= bin_edges[idx + 1] and idx != nbins - 1:
+                    idx += 1
+                counts[k, idx] += 1
+    return counts.sum(axis=0)
+
+
+def _threshold_otsu(
+    img: np.ndarray,
+    mask: np.ndarray = None,
+    nbins: int = 256
+) -> float:
+    """
+    Function for computing the Otsu threshold of an image.
+
+    Returns
+    -------
+    output : float
+        Threshold value, same as skimage.filters.threshold_otsu gives
+        for img[~mask].
+
+    Parameters
+    ----------
+    img : np.ndarray
+        Input image.
+    mask : np.ndarray, optional
+        Boolean mask of the pixels to ignore, all pixels are used by default.
+    nbins : int, optional
+        Number of histogram bins, 256 by default.
+
+    Notes
+    -----
+    With a mask the histogram of a float image is accumulated in a single
+    pass over the image, without copying the unmasked pixels. Images of
+    other types are passed to skimage.filters.threshold_otsu, which bins
+    integer images by their values.
+    """
+
+    if not np.issubdtype(img.dtype, np.floating):
+        return threshold_otsu(img if mask is None else img[~mask], nbins)
+    if mask is None:
+        lo, hi = img.min(), img.max()
+    else:
+        lo, hi = _masked_min_max(img, mask)
+        if lo > hi:
+            raise ValueError("all pixels are masked")
+        lo, hi = img.dtype.type(lo), img.dtype.type(hi)
+    if lo == hi:
+        return lo
+
+    if mask is None:
+        counts, bin_edges = np.histogram(img, bins=nbins, range=(lo, hi))
+    else:
+        bin_edges = np.linspace(lo, hi, nbins + 1, dtype=img.dtype)
+        counts = _masked_histogram(img, mask, bin_edges)
+    bin_centers = (bin_edges[:-1] + bin_edges[1:]) / 2.0
+    return _otsu_from_hist(counts.astype(np.float32), bin_centers)
+
+
+def _canny(
+    img: np.ndarray
+) -> np.ndarray:
+    """
+    Function for detecting edges with the Canny operator.
+
+    Returns
+    -------
+    output : np.ndarray
+        2D boolean edges map.
+
+    Parameters
+    ----------
+    img : np.ndarray
+        2D input image.
+
+    Notes
+    -----
+    ArrayFire implementation with Otsu thresholds is used if the arrayfire
+    package and its libraries can be loaded, otherwise
+    skimage.feature.canny.
+    """
+
+    if af is not None:
+        edges = af.canny(
+            af.from_ndarray(img), low_threshold=0.2, high_threshold=0.8,
+            threshold_type=af.CANNY_THRESHOLD.AUTO_OTSU, sobel_window=3,
+            is_fast=True)
+        return edges.to_ndarray().astype(bool, copy=False)
+    return canny(img, sigma=0.01)
 
 
 def fix_object(
@@ -65,6 +640,10 @@ def fix_object(
 
     if obj['type'] != 'region' or len(obj['data']) < 3:
         return [None]
+    obj['data'] = np.ascontiguousarray(obj['data'], dtype=np.float64)
+    if (_signed_area(obj['data']) != 0
+            and not _has_self_intersection(obj['data'])):
+        return [obj]
     p = Polygon(obj['data'])
     if not p.is_valid:
         p_clean = p.buffer(0)
@@ -72,11 +651,11 @@ def fix_object(
             objs = []
             for g in p_clean.geoms:
                 tmp = obj.copy()
-                tmp['data'] = g.exterior.coords[:]
+                tmp['data'] = np.asarray(g.exterior.coords)
                 objs.append(tmp)
             return objs
         if p_clean.is_valid and p_clean.exterior.coords:
-            obj['data'] = p_clean.exterior.coords[:]
+            obj['data'] = np.asarray(p_clean.exterior.coords)
         elif skip_unfixable:
             return [None]
         else:
@@ -115,49 +694,434 @@ def fix_contours(
     return json_contours
 
 
-def get_region_json(
-    region
-) -> dict:
+#  Segments of the marching squares cases as pairs of square edges:
+#  0 - top, 1 - bottom, 2 - left, 3 - right, -1 - no segment
+_SQUARE_SEGMENTS = np.array([
+    [[-1, -1], [-1, -1]], [[0, 2], [-1, -1]], [[3, 0], [-1, -1]],
+    [[3, 2], [-1, -1]], [[2, 1], [-1, -1]], [[0, 1], [-1, -1]],
+    [[3, 0], [2, 1]], [[3, 1], [-1, -1]], [[1, 3], [-1, -1]],
+    [[0, 2], [1, 3]], [[1, 0], [-1, -1]], [[1, 2], [-1, -1]],
+    [[2, 3], [-1, -1]], [[0, 3], [-1, -1]], [[2, 0], [-1, -1]],
+    [[-1, -1], [-1, -1]]
+])
+
+
+@njit(cache=True)
+def _hole_owners(
+    labels: np.ndarray,
+    bg_labels: np.ndarray,
+    n_bg: int
+) -> np.ndarray:
     """
-    The function to convert the RegionProperties of the contour
-    to the dictionary with the contour coordinates.
+    Function for finding the regions enclosing background components.
 
     Returns
     -------
-    output : dict
-        The dictionary with contour coordinates.
-        Dictionary structure: {'type': 'region', 'data': [coordinates]}
+    output : np.ndarray
+        Label of the region enclosing each background component,
+        0 for the components touching the image border.
+
+    Parameters
+    ----------
+    labels : np.ndarray
+        2D label image, background is labeled with 0.
+    bg_labels : np.ndarray
+        8-connected components of the background.
+    n_bg : int
+        Number of the background components.
+
+    Notes
+    -----
+    A background component not touching the image border is enclosed
+    by the region above its first pixel in raster order.
+    """
+
+    h, w = labels.shape
+    owners = np.full(n_bg + 1, -1, dtype=np.int64)
+    owners[0] = 0
+    for r in range(h):
+        for c in range(w):
+            k = bg_labels[r, c]
+            if owners[k] < 0:
+                owners[k] = labels[r - 1, c] if r > 0 else 0
+    for r in range(h):
+        owners[bg_labels[r, 0]] = 0
+        owners[bg_labels[r, w - 1]] = 0
+    for c in range(w):
+        owners[bg_labels[0, c]] = 0
+        owners[bg_labels[h - 1, c]] = 0
+    return owners
+
+
+@njit(cache=True)
+def _grow(
+    a: np.ndarray
+) -> np.ndarray:
+    """
+    Function for doubling the capacity of a buffer.
+    """
+
+    return np.concatenate((a, np.empty_like(a)))
+
+
+@njit(cache=True)
+def _find_contours(
+    labels: np.ndarray,
+    bg_labels: np.ndarray,
+    owners: np.ndarray
+):
+    """
+    Function for finding contours of all labeled regions with holes filled.
+
+    Returns
+    -------
+    coords : np.ndarray
+        Nx2 float64 array of (row, col) coordinates of all contours,
+        relative to origins.
+    starts : np.ndarray
+        Offsets of the contours in coords, the last item is N.
+    origins : np.ndarray
+        (row, col) origin of each contour.
+
+    Parameters
+    ----------
+    labels : np.ndarray
+        2D label image, background is labeled with 0,
+        regions must be 8-connected.
+    bg_labels : np.ndarray
+        8-connected components of the background.
+    owners : np.ndarray
+        Regions enclosing the background components,
+        see _hole_owners.
+
+    Notes
+    -----
+    Produces the same contours in the same order as
+    skimage.measure.find_contours(np.pad(region.image_filled, 1), 0)
+    for each region of skimage.measure.regionprops(labels), the origin
+    being the top left corner of the padded bounding box. The marching
+    squares are run over the whole image at once, every square belongs to
+    at most one region since the regions are 8-connected.
+    """
+
+    h, w = labels.shape
+    n_labels = labels.max()
+    stride = n_labels + 1
+
+    top = np.full(n_labels + 1, h, dtype=np.int64)
+    left = np.full(n_labels + 1, w, dtype=np.int64)
+    for r in range(h):
+        for c in range(w):
+            lbl = labels[r, c]
+            top[lbl] = min(top[lbl], r)
+            left[lbl] = min(left[lbl], c)
+
+    #  Contours are linked lists of nodes, the maps hold the contours
+    #  by the keys of their first and last points
+    starts_map = Dict.empty(key_type=types.int64, value_type=types.int64)
+    ends_map = Dict.empty(key_type=types.int64, value_type=types.int64)
+    node_r = np.empty(1024, dtype=np.int64)
+    node_c = np.empty(1024, dtype=np.int64)
+    node_next = np.empty(1024, dtype=np.int64)
+    first = np.empty(64, dtype=np.int64)
+    last = np.empty(64, dtype=np.int64)
+    contour_labels = np.empty(64, dtype=np.int64)
+    alive = np.empty(64, dtype=np.bool_)
+    n_nodes = 0
+    n_contours = 0
+
+    values = np.zeros(4, dtype=np.int64)
+    points = np.empty((4, 2), dtype=np.int64)
+    for r in range(-1, h):
+        for c in range(-1, w):
+            lbl = 0
+            for i in range(4):
+                pr, pc = r + (i >> 1), c + (i & 1)
+                if 0 <= pr < h and 0 <= pc < w:
+                    lbl = max(lbl, labels[pr, pc])
+            if lbl == 0:
+                continue
+            #  Corner values of the filled region: ul, ur, ll, lr
+            case = 0
+            for i in range(4):
+                pr, pc = r + (i >> 1), c + (i & 1)
+                values[i] = 0
+                if 0 <= pr < h and 0 <= pc < w:
+                    v = labels[pr, pc]
+                    if v == lbl or (v == 0
+                                    and owners[bg_labels[pr, pc]] == lbl):
+                        values[i] = 1
+                case += values[i] << i
+            ul, ur, ll, lr = values[0], values[1], values[2], values[3]
+            #  Points on the square edges at the level 0
+            points[0, 0], points[0, 1] = r, c + (ul & (1 - ur))
+            points[1, 0], points[1, 1] = r + 1, c + (ll & (1 - lr))
+            points[2, 0], points[2, 1] = r + (ul & (1 - ll)), c
+            points[3, 0], points[3, 1] = r + (ur & (1 - lr)), c + 1
+
+            for s in range(2):
+                i_from = _SQUARE_SEGMENTS[case, s, 0]
+                if i_from < 0:
+                    break
+                i_to = _SQUARE_SEGMENTS[case, s, 1]
+                fr, fc = points[i_from, 0], points[i_from, 1]
+                tr, tc = points[i_to, 0], points[i_to, 1]
+                if fr == tr and fc == tc:
+                    continue
+                key_from = ((fr + 1) * (w + 2) + fc + 1) * stride + lbl
+                key_to = ((tr + 1) * (w + 2) + tc + 1) * stride + lbl
+                tail, head = -1, -1
+                if key_to in starts_map:
+                    tail = starts_map[key_to]
+                    del starts_map[key_to]
+                if key_from in ends_map:
+                    head = ends_map[key_from]
+                    del ends_map[key_from]
+
+                if tail >= 0 and head >= 0 and tail == head:
+                    #  Close the contour
+                    if n_nodes == node_r.shape[0]:
+                        node_r, node_c = _grow(node_r), _grow(node_c)
+                        node_next = _grow(node_next)
+                    node_r[n_nodes], node_c[n_nodes] = tr, tc
+                    node_next[last[head]] = n_nodes
+                    last[head] = n_nodes
+                    n_nodes += 1
+                elif tail >= 0 and head >= 0:
+                    #  Join the contours keeping the first created one
+                    node_next[last[head]] = first[tail]
+                    if tail > head:
+                        last[head] = last[tail]
+                        alive[tail] = False
+                        keep = head
+                    else:
+                        first[tail] = first[head]
+                        alive[head] = False
+                        keep = tail
+                    i = first[keep]
+                    starts_map[((node_r[i] + 1) * (w + 2) + node_c[i] + 1)
+                               * stride + lbl] = keep
+                    i = last[keep]
+                    ends_map[((node_r[i] + 1) * (w + 2) + node_c[i] + 1)
+                             * stride + lbl] = keep
+                else:
+                    if n_nodes + 1 >= node_r.shape[0]:
+                        node_r, node_c = _grow(node_r), _grow(node_c)
+                        node_next = _grow(node_next)
+                    if tail < 0 and head < 0:
+                        #  Start a new contour
+                        if n_contours == first.shape[0]:
+                            first, last = _grow(first), _grow(last)
+                            contour_labels = _grow(contour_labels)
+                            alive = _grow(alive)
+                        node_r[n_nodes], node_c[n_nodes] = fr, fc
+                        node_r[n_nodes + 1], node_c[n_nodes + 1] = tr, tc
+                        node_next[n_nodes] = n_nodes + 1
+                        first[n_contours] = n_nodes
+                        last[n_contours] = n_nodes + 1
+                        contour_labels[n_contours] = lbl
+                        alive[n_contours] = True
+                        starts_map[key_from] = n_contours
+                        ends_map[key_to] = n_contours
+                        n_nodes += 2
+                        n_contours += 1
+                    elif head < 0:
+                        #  Prepend the segment to the tail contour
+                        node_r[n_nodes], node_c[n_nodes] = fr, fc
+                        node_next[n_nodes] = first[tail]
+                        first[tail] = n_nodes
+                        starts_map[key_from] = tail
+                        n_nodes += 1
+                    else:
+                        #  Append the segment to the head contour
+                        node_r[n_nodes], node_c[n_nodes] = tr, tc
+                        node_next[last[head]] = n_nodes
+                        last[head] = n_nodes
+                        ends_map[key_to] = head
+                        n_nodes += 1
+
+    #  Contours ordered by label, then by creation
+    ids = np.nonzero(alive[:n_contours])[0]
+    ids = ids[np.argsort(contour_labels[ids], kind='mergesort')]
+    coords = np.empty((n_nodes, 2), dtype=np.float64)
+    starts = np.empty(ids.shape[0] + 1, dtype=np.int64)
+    origins = np.empty((ids.shape[0], 2), dtype=np.float64)
+    n = 0
+    for k in range(ids.shape[0]):
+        lbl = contour_labels[ids[k]]
+        origins[k, 0], origins[k, 1] = top[lbl] - 1, left[lbl] - 1
+        starts[k] = n
+        i = first[ids[k]]
+        while True:
+            coords[n, 0] = node_r[i] - origins[k, 0]
+            coords[n, 1] = node_c[i] - origins[k, 1]
+            n += 1
+            if i == last[ids[k]]:
+                break
+            i = node_next[i]
+    starts[ids.shape[0]] = n
+    return coords[:n], starts, origins
+
+
+@njit(cache=True, parallel=True)
+def _farthest_points(
+    coords: np.ndarray,
+    seg_starts: np.ndarray,
+    seg_ends: np.ndarray,
+    sin_a: np.ndarray,
+    cos_a: np.ndarray,
+    tolerance: float
+) -> np.ndarray:
+    """
+    Function for finding the points farthest from contour segments.
+
+    Returns
+    -------
+    output : np.ndarray
+        Index of the point farthest from each segment, -1 if all the points
+        are within the tolerance.
 
     Parameters
     ----------
-    region : RegionProperties
-        The RegionProperties object described contour.
-    """
-
-    field_mask = region.filled_image
-    field_mask = np.pad(field_mask, 1, mode='constant') != 0
-    contours = find_contours(field_mask, 0)
-    contours = [approximate_polygon(c, 1) - 1 for c in contours]
-    bbox = region.bbox
-    new_bbox = (bbox[0], bbox[1], bbox[3], bbox[2])
-    r_json = list()
-    for cont in contours:
-        new_coord = list()
-        for point in cont:
-            new_coord.append((point[1]+new_bbox[1], point[0]+new_bbox[0]))
-
-        region_json = {'type': 'region', 'data': new_coord}
-        r_json.append(region_json)
-    return r_json
-
-
-def regionprops_to_json(
-    regions: list,
-    size: list,
+    coords : np.ndarray
+        Nx2 float64 array of coordinates of all contours.
+    seg_starts : np.ndarray
+        Indices of the segment starts in coords.
+    seg_ends : np.ndarray
+        Indices of the segment ends in coords.
+    sin_a : np.ndarray
+        Sine of the negated angle of each segment.
+    cos_a : np.ndarray
+        Cosine of the negated angle of each segment.
+    tolerance : float
+        Maximum distance from the points to the segment.
+
+    Notes
+    -----
+    Distances are computed with the same arithmetic as
+    skimage.measure.approximate_polygon.
+    """
+
+    farthest = np.empty(seg_starts.shape[0], dtype=np.int64)
+    for k in prange(seg_starts.shape[0]):
+        start, end = seg_starts[k], seg_ends[k]
+        r0, c0 = coords[start, 0], coords[start, 1]
+        r1, c1 = coords[end, 0], coords[end, 1]
+        dr = r1 - r0
+        dc = c1 - c0
+        segment_dist = c0 * sin_a[k] + r0 * cos_a[k]
+
+        #  Perpendicular distance for points projected inside the segment,
+        #  otherwise the distance to the nearest segment end
+        max_dist = -1.0
+        new_end = -1
+        for i in range(start + 1, end):
+            dr0 = coords[i, 0] - r0
+            dc0 = coords[i, 1] - c0
+            dr1 = coords[i, 0] - r1
+            dc1 = coords[i, 1] - c1
+            if dr0 * dr + dc0 * dc > 0 and -dr1 * dr - dc1 * dc > 0:
+                dist = abs(coords[i, 0] * cos_a[k] + coords[i, 1] * sin_a[k]
+                           - segment_dist)
+            else:
+                dist = min(np.sqrt(dc0 ** 2 + dr0 ** 2),
+                           np.sqrt(dc1 ** 2 + dr1 ** 2))
+            if dist > max_dist:
+                max_dist = dist
+                new_end = i
+        farthest[k] = new_end if max_dist > tolerance else -1
+    return farthest
+
+
+def _approximate_contours(
+    coords: np.ndarray,
+    starts: np.ndarray,
+    tolerance: float
+) -> np.ndarray:
+    """
+    Function for approximating contours with the Douglas-Peucker algorithm.
+
+    Returns
+    -------
+    output : np.ndarray
+        Boolean mask of the points kept in the approximated contours.
+
+    Parameters
+    ----------
+    coords : np.ndarray
+        Nx2 float64 array of coordinates of all contours.
+    starts : np.ndarray
+        Offsets of the contours in coords, the last item is N.
+    tolerance : float
+        Maximum distance from the original points to the approximated
+        contours.
+
+    Notes
+    -----
+    Gives the same result as skimage.measure.approximate_polygon for
+    each contour. The segments of all contours are split level by level:
+    the segment angles are computed with numpy, as skimage does, since
+    the trigonometric functions of numba may differ in the last bit,
+    and the farthest points are searched in parallel.
+    """
+
+    keep = np.ones(coords.shape[0], dtype=bool)
+    if tolerance <= 0:
+        return keep
+    lengths = np.diff(starts)
+    seg_starts = starts[:-1][lengths >= 3]
+    seg_ends = starts[1:][lengths >= 3] - 1
+    for i in range(seg_starts.shape[0]):
+        keep[seg_starts[i] + 1:seg_ends[i]] = False
+
+    while seg_starts.shape[0] > 0:
+        segment_angle = -np.arctan2(
+            coords[seg_ends, 0] - coords[seg_starts, 0],
+            coords[seg_ends, 1] - coords[seg_starts, 1])
+        new_ends = _farthest_points(
+            coords, seg_starts, seg_ends, np.sin(segment_angle),
+            np.cos(segment_angle), tolerance)
+        split = new_ends >= 0
+        new_ends = new_ends[split]
+        keep[new_ends] = True
+        seg_starts = np.concatenate((seg_starts[split], new_ends))
+        seg_ends = np.concatenate((new_ends, seg_ends[split]))
+        inner = seg_ends - seg_starts > 1
+        seg_starts, seg_ends = seg_starts[inner], seg_ends[inner]
+    return keep
+
+
+def _approximate_polygon(
+    coords: np.ndarray,
+    tolerance: float
+) -> np.ndarray:
+    """
+    Function for approximating a contour with the Douglas-Peucker algorithm.
+
+    Returns
+    -------
+    output : np.ndarray
+        Boolean mask of the contour points kept in the approximation.
+
+    Parameters
+    ----------
+    coords : np.ndarray
+        Nx2 float64 array of the contour coordinates.
+    tolerance : float
+        Maximum distance from the original points to the approximated
+        contour.
+    """
+
+    return _approximate_contours(
+        coords, np.array([0, coords.shape[0]]), tolerance)
+
+
+def labels_to_json(
+    labeled_img: np.ndarray
 ) -> dict:
     """
-    The function to convert a list of contour' RegionProperties to a
-    json dictionary with contours.
+    The function to convert a label image to a json dictionary
+    with contours.
 
     Returns
     -------
@@ -167,18 +1131,30 @@ def regionprops_to_json(
 
     Parameters
     ----------
-    regions : list
-        List of contour' RegionProperties.
-    size : list
-        Image size where contours is defined.
+    labeled_img : np.ndarray
+        2D label image, background is labeled with 0.
+
+    Notes
+    -----
+    Holes of the regions are filled, regions connected only diagonally
+    produce separate contours, as find_contours does for each region.
     """
 
+    bg_labels, n_bg = label(labeled_img == 0, np.ones((3, 3), dtype=bool))
+    owners = _hole_owners(labeled_img, bg_labels, n_bg)
+    coords, starts, origins = _find_contours(labeled_img, bg_labels, owners)
+    keep = _approximate_contours(coords, starts, 1.0)
+    new_starts = np.concatenate(([0], np.cumsum(keep)))[starts]
+    coords = coords[keep] + np.repeat(origins, np.diff(new_starts), axis=0)
+    coords = np.ascontiguousarray(coords[:, ::-1])
+
     json_contours = {
         'objects': list(),
-        'size': size
+        'size': list(labeled_img.shape)
     }
-    for reg in regions:
-        json_contours['objects'].extend(get_region_json(reg))
+    for i in range(len(new_starts) - 1):
+        new_coord = coords[new_starts[i]:new_starts[i + 1]]
+        json_contours['objects'].append({'type': 'region', 'data': new_coord})
     return json_contours
 
 
@@ -215,8 +1191,8 @@ def filter_contours(
     if not max_t:
         max_t = np.inf
     for obj in json_contours['objects']:
-        p = Polygon(obj['data'])
-        if p.area >= min_t and p.area <= max_t:
+        area = abs(_signed_area(np.asarray(obj['data'], dtype=np.float64)))
+        if area >= min_t and area <= max_t:
             filtered_contours['objects'].append(obj)
     return filtered_contours
 
@@ -301,35 +1277,31 @@ def find_fields(
     """
 
     #  Generate mask of low vegetation regions
-    low_veg_mask = np.zeros(index_img.shape, dtype=bool)
-    low_veg_mask[index_img <= low_veg_thresh] = True
-    binary_dilation(low_veg_mask, disk(w_dilate), out=low_veg_mask)
+    low_veg_mask = index_img <= low_veg_thresh
+    low_veg_mask = _binary_dilation(low_veg_mask, _disk(w_dilate))
 
     #  Detect mask of potential field regions
-    field_mask = np.zeros(index_img.shape, dtype=bool)
-    t_otsu_fields = threshold_otsu(index_img[~low_veg_mask])
-    field_mask[(index_img < t_otsu_fields) & (~low_veg_mask)] = True
+    t_otsu_fields = _threshold_otsu(index_img, low_veg_mask)
+    field_mask = np.empty(index_img.shape, dtype=bool)
+    _field_mask(index_img, low_veg_mask, t_otsu_fields, field_mask)
 
     #  Morphological filtration of Canny edges map
     if edges is not None:
-        t_otsu_edges = threshold_otsu(edges)
-        edges_b = (edges >= t_otsu_edges).astype(bool)
+        edges_b = edges >= _threshold_otsu(edges)
     else:
-        edges = canny(index_img, sigma=0.01)
-        edges_b = edges.astype(bool)
+        edges_b = _canny(index_img)
 
-    edges_b = closing(edges_b, disk(w_closing)).astype(np.int16, copy=False)
+    edges_b = _binary_closing(edges_b, _disk(w_closing))
 
     #  Segmenting fields using binary edges map
-    field_mask_wo_edges = field_mask - edges_b
-    np.clip(field_mask_wo_edges, 0, 1, out=field_mask_wo_edges)
+    np.logical_not(edges_b, out=edges_b)
+    field_mask_wo_edges = np.logical_and(field_mask, edges_b, out=field_mask)
 
     #  Obtaining connected components
-    labeled_img = label(field_mask_wo_edges)
+    labeled_img, _ = label(field_mask_wo_edges, np.ones((3, 3), dtype=bool))
 
     #  Obtaining field contours and vectorization
-    src_regions = regionprops(labeled_img)
-    dst_regions = regionprops_to_json(src_regions, list(labeled_img.shape))
+    dst_regions = labels_to_json(labeled_img)
 
     #  Validating and fixing contours
     dst_regions = fix_contours(dst_regions)
@@ -389,10 +1361,11 @@ def run(
     [0; 1] range.
     """
 
-    index_img = imread(index_img_path)
+    index_img = np.require(
+        imread(index_img_path, mode='c'), np.float32, ['C', 'W'])
     np.clip(index_img, 0, 1, out=index_img)
 
-    edges_img = imread(edges_img_path)
+    edges_img = np.require(imread(edges_img_path), np.float32, ['C'])
 
     resolution_factor = (spatial_resolution * 1e-3) ** 2
     min_area_thresh = min_area_thresh / resolution_factor
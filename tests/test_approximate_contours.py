@@ -0,0 +1,42 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+from scipy.ndimage import binary_opening
+from skimage.measure import approximate_polygon, find_contours
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from fields_recognizer import _approximate_contours  # noqa
+
+
+def assert_same_approximation(contours, tolerance):
+    coords = np.concatenate(contours)
+    starts = np.cumsum([0] + [len(c) for c in contours])
+    keep = _approximate_contours(coords, starts, tolerance)
+    for i, contour in enumerate(contours):
+        np.testing.assert_array_equal(
+            coords[starts[i]:starts[i + 1]][keep[starts[i]:starts[i + 1]]],
+            approximate_polygon(contour, tolerance))
+
+
+def test_mask_contours():
+    rng = np.random.default_rng(0)
+    for i in range(20):
+        mask = rng.random((200, 200)) < rng.uniform(0.3, 0.7)
+        if i % 2:
+            mask = binary_opening(mask, np.ones((2, 2), dtype=bool))
+        contours = find_contours(np.pad(mask, 1), 0)
+        assert_same_approximation(contours, 1.0)
+
+
+def test_random_walks():
+    rng = np.random.default_rng(1)
+    contours = [np.cumsum(rng.normal(size=(n, 2)), axis=0)
+                for n in rng.integers(1, 300, 200)]
+    for tolerance in (0.0, 0.5, 2.0):
+        assert_same_approximation(contours, tolerance)
+
+
+if __name__ == '__main__':
+    test_mask_contours()
+    test_random_walks()
@@ -0,0 +1,65 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+from scipy.ndimage import binary_opening, label
+from skimage.measure import approximate_polygon, find_contours, regionprops
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from fields_recognizer import labels_to_json  # noqa
+
+
+def regions_to_json(labeled_img):
+    """
+    Reference per-region contours: find_contours of each padded filled
+    region, simplified and shifted to the image coordinates.
+    """
+
+    objects = list()
+    for region in regionprops(labeled_img):
+        field_mask = np.pad(region.image_filled, 1, mode='constant') != 0
+        for contour in find_contours(field_mask, 0):
+            contour = approximate_polygon(contour, 1) - 1
+            contour += region.bbox[:2]
+            objects.append(contour[:, ::-1])
+    return objects
+
+
+def assert_same_contours(labeled_img):
+    expected = regions_to_json(labeled_img)
+    objects = labels_to_json(labeled_img)['objects']
+    assert len(objects) == len(expected)
+    for obj, contour in zip(objects, expected):
+        np.testing.assert_array_equal(obj['data'], contour)
+
+
+def test_random_masks():
+    rng = np.random.default_rng(0)
+    for _ in range(300):
+        shape = rng.integers(1, 40, 2)
+        mask = rng.random(shape) < rng.uniform(0.2, 0.8)
+        labeled_img, _ = label(mask, np.ones((3, 3), dtype=bool))
+        assert_same_contours(labeled_img)
+
+
+def test_blobs_with_holes():
+    rng = np.random.default_rng(1)
+    mask = rng.random((400, 400)) < 0.55
+    mask = binary_opening(mask, np.ones((2, 2), dtype=bool))
+    labeled_img, _ = label(mask, np.ones((3, 3), dtype=bool))
+    assert_same_contours(labeled_img)
+
+
+def test_diagonal_contact():
+    mask = np.zeros((8, 8), dtype=bool)
+    mask[1:4, 1:4] = True
+    mask[4:7, 4:7] = True
+    labeled_img, _ = label(mask, np.ones((3, 3), dtype=bool))
+    assert len(labels_to_json(labeled_img)['objects']) == 2
+    assert_same_contours(labeled_img)
+
+
+if __name__ == '__main__':
+    test_random_masks()
+    test_blobs_with_holes()
+    test_diagonal_contact()
@@ -5,6 +5,11 @@ from pathlib import Path
 
 from PIL import Image, ImageDraw
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 def validate(
     img_array: np.ndarray,
@@ -73,8 +78,9 @@ def draw_contours(
     for obj in json_contours['objects']:
         if obj['type'] == 'region':
             for contour in obj['data']:
-                coordinates = contour + [contour[0]]
-                dr.line(list(map(tuple, coordinates)), fill=color, width=width)
+                coordinates = np.asarray(contour, dtype=np.float64)
+                coordinates = np.concatenate((coordinates, coordinates[:1]))
+                dr.line(coordinates.ravel().tolist(), fill=color, width=width)
         else:
             raise TypeError(obj['type'])
     return np.array(img)
@@ -117,8 +123,12 @@ def visualize(
       -- 1 for float32 image.
     """
 
-    with open(contours_path, "r") as door:
-        json_contours = json.load(door)
+    if orjson is not None:
+        with open(contours_path, "rb") as door:
+            json_contours = orjson.loads(door.read())
+    else:
+        with open(contours_path, "r") as door:
+            json_contours = json.load(door)
     img_size = tuple(json_contours['size'])
 
     if src_img_path:
@@ -127,7 +137,7 @@ def visualize(
             validate(src_array, img_size)
             format = src_img.format
     else:
-        src_array = np.zeros(img_size[::-1]).astype(np.uint8)
+        src_array = np.zeros(img_size[::-1], dtype=np.uint8)
         format = 'PNG'
 
     if src_array.dtype == np.uint8: